@@ -11,16 +11,31 @@ License: MIT
 """
 
 import argparse
+import calendar
+import hashlib
+import json
 import logging
+import math
+import operator
+import re
+import shelve
 import sys
 import time
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Union, Any
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union, Any
+from collections import defaultdict, deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from functools import lru_cache
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    from geopy.extra.rate_limiter import RateLimiter
     from geopy.geocoders import Nominatim
     from tabulate import tabulate
 except ImportError as e:
@@ -28,12 +43,21 @@ except ImportError as e:
     print("Please install dependencies: pip install requests geopy tabulate")
     sys.exit(1)
 
+# Optional faster JSON decoding
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
 # Configure logging
+# Logs go to stderr: stdout carries the report only (it is piped to the AI
+# prompt), and background DVF fetches log while Section 1 is printed
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.StreamHandler(sys.stdout)
+        logging.StreamHandler(sys.stderr)
     ]
 )
 logger = logging.getLogger(__name__)
@@ -44,7 +68,53 @@ DVF_API_BASE_URL = "https://apidf-preprod.cerema.fr/dvf_opendata/mutations/"
 NOMINATIM_USER_AGENT = "GeoSpotlight/2.0"
 DEFAULT_TIMEOUT = 30
 MAX_RETRIES = 3
+# HTTP statuses retried with backoff by the shared session
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
 SEARCH_RADIUS = 350
+DVF_MAX_CONCURRENT_PAGES = 8
+DVF_MAX_CONCURRENT_LOOKUPS = 8
+DVF_MIN_VALUE = 10000  # €, lower values are likely errors
+DVF_MIN_BUILT_AREA = 10  # m², smaller surfaces are likely errors
+# DVF property type labels (libtypbien) compared in the price table
+DVF_APARTMENT_LABEL = 'UN APPARTEMENT'
+DVF_HOUSE_LABEL = 'UNE MAISON'
+OVERPASS_QUERY_TEMPLATE = "[out:json];\n(\n{body}\n);\nout;"
+# OSM tag keys checked, in priority order, to categorize a place
+PLACE_CATEGORY_KEYS = ('amenity', 'shop', 'office', 'healthcare', 'highway', 'railway', 'aeroway')
+CACHE_DIR = Path.home() / ".cache" / "geospotlight"
+GEOCODE_CACHE_PATH = CACHE_DIR / "geocode"
+OVERPASS_CACHE_DIR = CACHE_DIR / "overpass"
+OVERPASS_CACHE_TTL = 7 * 24 * 3600  # seconds
+# Raw "lat,lon" input, geocoded without calling Nominatim
+COORDINATES_PATTERN = re.compile(r'\s*(-?\d+\.?\d*)\s*,\s*(-?\d+\.?\d*)\s*')
+
+
+def _build_session() -> requests.Session:
+    """Create the HTTP session shared by all API calls.
+
+    Connections are pooled and kept alive across requests, and transient
+    server errors are retried with exponential backoff by urllib3.
+    Rate-limited responses (429) honor the server's Retry-After header.
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=1,
+        status_forcelist=RETRY_STATUS_CODES,
+        # Overpass queries are sent as POST (read-only, safe to retry)
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {'POST'}
+    )
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+_SESSION = _build_session()
+
+# Single geocoder, throttled to Nominatim's usage policy of 1 request per second
+_GEOLOCATOR = Nominatim(user_agent=NOMINATIM_USER_AGENT, timeout=DEFAULT_TIMEOUT)
+_geocode = RateLimiter(_GEOLOCATOR.geocode, min_delay_seconds=1.0, max_retries=2, swallow_exceptions=False)
 
 @dataclass
 class PropertyTransaction:
@@ -67,6 +137,18 @@ class PropertyTransaction:
             self.price_per_m2 = self.land_value / self.built_area
 
 
+@dataclass
+class DvfColumns:
+    """Column-oriented (struct of arrays) view of refined DVF entries."""
+    built_area: array
+    land_value: array
+    price_per_m2: array  # NaN when unavailable
+    property_type: List[Optional[str]]
+
+    def __len__(self) -> int:
+        return len(self.built_area)
+
+
 class GeoSpotlightError(Exception):
     """Base class for GeoSpotlight errors."""
     pass
@@ -81,12 +163,35 @@ class ValidationError(GeoSpotlightError):
     """Data validation errors."""
     pass
 
-@lru_cache(maxsize=128)
-def get_coordinates(address: str) -> Tuple[float, float]:
+def _read_geocode_cache(key: str) -> Optional[Tuple[float, float]]:
+    """Return coordinates stored on disk for a normalized address, if any."""
+    try:
+        with shelve.open(str(GEOCODE_CACHE_PATH), flag='r') as cache:
+            return cache.get(key)
+    except Exception:
+        # Missing or unreadable cache is never fatal
+        return None
+
+def _write_geocode_cache(key: str, coordinates: Tuple[float, float]) -> None:
+    """Persist coordinates for a normalized address."""
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with shelve.open(str(GEOCODE_CACHE_PATH)) as cache:
+            cache[key] = coordinates
+    except Exception as e:
+        logger.warning(f"Unable to write geocoding cache: {e}")
+
+@lru_cache(maxsize=1024)
+def get_coordinates(address: str, use_cache: bool = True) -> Tuple[float, float]:
     """Get geographical coordinates for an address.
 
+    Raw coordinates such as "48.85,2.35" are returned directly. Other
+    results are persisted on disk so repeated runs for the same address
+    do not hit Nominatim again.
+
     Args:
         address: Address to geocode
+        use_cache: Read and write the on-disk geocoding cache
 
     Returns:
         Tuple (latitude, longitude)
@@ -94,25 +199,65 @@ def get_coordinates(address: str) -> Tuple[float, float]:
     Raises:
         ValidationError: If address cannot be geocoded
     """
+    match = COORDINATES_PATTERN.fullmatch(address)
+    if match:
+        latitude, longitude = float(match.group(1)), float(match.group(2))
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+            logger.info(f"Using raw coordinates: {latitude}, {longitude}")
+            return (latitude, longitude)
+
+    cache_key = address.strip().lower()
+    if use_cache:
+        cached = _read_geocode_cache(cache_key)
+        if cached is not None:
+            logger.info(f"Coordinates found in cache for '{address}': {cached[0]}, {cached[1]}")
+            return cached
+
     try:
-        geolocator = Nominatim(user_agent=NOMINATIM_USER_AGENT, timeout=DEFAULT_TIMEOUT)
-        location = geolocator.geocode(address)
+        location = _geocode(address)
 
         if location is None:
             raise ValidationError(f"Unable to geocode address: {address}")
 
         logger.info(f"Coordinates found for '{address}': {location.latitude}, {location.longitude}")
-        return (location.latitude, location.longitude)
+        coordinates = (location.latitude, location.longitude)
 
     except Exception as e:
         logger.error(f"Geocoding error: {e}")
         raise ValidationError(f"Geocoding error: {e}")
 
-def request_overpass_api(query: str) -> Dict[str, Any]:
+    if use_cache:
+        _write_geocode_cache(cache_key, coordinates)
+    return coordinates
+
+def _read_overpass_cache(cache_path: Path) -> Optional[Dict[str, Any]]:
+    """Return a cached Overpass response if it exists and is still fresh."""
+    try:
+        if time.time() - cache_path.stat().st_mtime > OVERPASS_CACHE_TTL:
+            return None
+        return json_loads(cache_path.read_bytes())
+    except (OSError, ValueError):
+        # Missing, unreadable or corrupted entry is never fatal
+        return None
+
+def _write_overpass_cache(cache_path: Path, data: Dict[str, Any]) -> None:
+    """Persist an Overpass response."""
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_bytes(json.dumps(data).encode())
+    except OSError as e:
+        logger.warning(f"Unable to write Overpass cache: {e}")
+
+def request_overpass_api(query: str, use_cache: bool = True) -> Dict[str, Any]:
     """Make a request to the Overpass API and return the JSON result.
 
+    Responses are cached on disk, keyed by a hash of the query, for
+    OVERPASS_CACHE_TTL seconds. Responses carrying a 'remark' (server-side
+    runtime error, results may be incomplete) are not cached.
+
     Args:
         query: Overpass QL query string
+        use_cache: Read and write the on-disk response cache
 
     Returns:
         JSON response from Overpass API
@@ -120,18 +265,35 @@ def request_overpass_api(query: str) -> Dict[str, Any]:
     Raises:
         APIError: If the API request fails
     """
+    cache_path = OVERPASS_CACHE_DIR / f"{hashlib.blake2b(query.encode(), digest_size=16).hexdigest()}.json"
+    if use_cache:
+        cached = _read_overpass_cache(cache_path)
+        if cached is not None:
+            logger.info(f"Overpass response found in cache ({cache_path.name})")
+            return cached
+
     try:
-        response = requests.get(
+        # Sent in the body: a union of every amenity tag is too long for a
+        # GET request line on common HTTP front ends (414)
+        response = _SESSION.post(
             OVERPASS_API_URL,
-            params={'data': query},
+            data={'data': query},
             timeout=DEFAULT_TIMEOUT
         )
         response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
+        data = json_loads(response.content)
+    except (requests.RequestException, ValueError) as e:
         logger.error(f"Overpass API request failed: {e}")
         raise APIError(f"Overpass API error: {e}")
 
+    # Server-side timeouts and memory errors come back as HTTP 200 with a
+    # 'remark' and partial results: never cache them
+    if data.get('remark'):
+        logger.warning(f"Overpass API remark: {data['remark']}")
+    elif use_cache:
+        _write_overpass_cache(cache_path, data)
+    return data
+
 def construct_overpass_query(amenities: List[Tuple[str, str]], coordinates: Tuple[float, float], radius: int) -> str:
     """Build an Overpass API query for the given amenities, coordinates, and radius.
 
@@ -146,45 +308,45 @@ def construct_overpass_query(amenities: List[Tuple[str, str]], coordinates: Tupl
     if not amenities:
         raise ValidationError("Amenities list cannot be empty")
 
-    query_parts = ["[out:json];", "("]
-
-    for key, value in amenities:
-        query_parts.append(f'node["{key}"="{value}"](around:{radius},{coordinates[0]},{coordinates[1]});')
-
-    query_parts.extend([");", "out;"])
-    return "\n".join(query_parts)
+    around = f"(around:{radius},{coordinates[0]},{coordinates[1]});"
+    body = "\n".join(f'node["{key}"="{value}"]{around}' for key, value in amenities)
+    return OVERPASS_QUERY_TEMPLATE.format(body=body)
 
-def search_places(amenities: List[Tuple[str, str]], coordinates: Tuple[float, float], radius: int = 2000) -> Dict[str, Any]:
+def search_places(amenities: List[Tuple[str, str]], coordinates: Tuple[float, float], radius: int = 2000,
+                  use_cache: bool = True) -> Dict[str, Any]:
     """Find places of specified amenities around the given coordinates within the specified radius.
 
+    All amenities are sent as a single Overpass union query.
+
     Args:
         amenities: List of (key, value) tuples for OSM tags
         coordinates: (latitude, longitude) tuple
         radius: Search radius in meters
+        use_cache: Read and write the on-disk Overpass response cache
 
     Returns:
         Dictionary containing search results
     """
     query = construct_overpass_query(amenities, coordinates, radius)
-    return request_overpass_api(query)
+    return request_overpass_api(query, use_cache)
 
 def sort_places_by_category(places):
     """Categorize places by their type and return a dictionary."""
-    categorized_places = {}
+    categorized_places = defaultdict(set)
     for place in places['elements']:
-        name = place.get("tags", {}).get("name")
-        if name:  # Only add the place if it has a name
-            # Extend the list of keys to include all possible categories
-            for key in ['amenity', 'shop', 'office', 'healthcare', 'highway', 'railway', 'aeroway']:
-                category = place.get("tags", {}).get(key)
-                if category:
-                    # Create a unique key for the category by combining the key and the value
-                    unique_category_key = f"{key}:{category}"
-                    if unique_category_key not in categorized_places:
-                        categorized_places[unique_category_key] = set()
-                    categorized_places[unique_category_key].add(name)
-                    break
-    return categorized_places
+        tags = place.get("tags")
+        if not tags:
+            continue
+        name = tags.get("name")
+        if not name:  # Only add the place if it has a name
+            continue
+        for key in PLACE_CATEGORY_KEYS:
+            category = tags.get(key)
+            if category:
+                # Create a unique key for the category by combining the key and the value
+                categorized_places[f"{key}:{category}"].add(name)
+                break
+    return dict(categorized_places)
 
 def retrieve_places_data(places_by_category, category):
     """Get the categorized places data for tabulation."""
@@ -235,88 +397,171 @@ def generate_bbox(center_coordinates: Tuple[float, float], radius_meters: int =
 
     return f"{lon_min},{lat_min},{lon_max},{lat_max}"
 
-def fetch_all_pages_dvf_api(bbox: str, min_year: str) -> List[Dict[str, Any]]:
+def _fetch_dvf_page(params: Dict[str, Any], page: int) -> Dict[str, Any]:
+    """
+    Fetch a single page of DVF results.
+    Transient failures are retried with exponential backoff by the shared session.
+
+    Args:
+        params: Query parameters shared by every page of the search
+        page: Page number to fetch (1-based)
+
+    Returns:
+        JSON response for the requested page
+
+    Raises:
+        APIError: If the API request fails after all retries
+    """
+    try:
+        logger.info(f"Fetching DVF data page {page}...")
+        response = _SESSION.get(DVF_API_BASE_URL, params=dict(params, page=page), timeout=DEFAULT_TIMEOUT)
+        response.raise_for_status()
+        data = json_loads(response.content)
+        logger.info(f"Successfully fetched {len(data.get('results', []))} entries from page {page}")
+        return data
+
+    except requests.exceptions.HTTPError as e:
+        if e.response.status_code == 403:
+            logger.error("Area too large for DVF API (max 0.02° × 0.02°)")
+            raise APIError(f"Area too large for DVF API: {e.response.text}")
+        raise APIError(f"HTTP error: {e}")
+
+    except requests.exceptions.RetryError as e:
+        # Retried statuses (RETRY_STATUS_CODES) still failing after the last attempt
+        raise APIError(f"HTTP error after {MAX_RETRIES} retries: {e}")
+
+    except requests.exceptions.RequestException as e:
+        raise APIError(f"Request failed after {MAX_RETRIES} retries: {e}")
+
+    except ValueError as e:
+        raise APIError(f"Invalid JSON response from DVF API: {e}")
+
+def _iter_dvf_pages(params: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield DVF entries page by page.
+    The first page gives the total count; remaining pages are fetched concurrently,
+    at most DVF_MAX_CONCURRENT_PAGES ahead of the consumer. If the count is
+    missing, the 'next' links are followed sequentially instead.
+
+    Args:
+        params: Query parameters shared by every page of the search
+
+    Yields:
+        Raw DVF entries, in API order
+    """
+    first_page = _fetch_dvf_page(params, 1)
+    page_results = first_page.get('results', [])
+    total_entries = len(page_results)
+    yield from page_results
+
+    if not first_page.get('next') or total_entries == 0:
+        logger.info(f"Completed fetching all pages. Total entries: {total_entries}")
+        return
+
+    total_count = first_page.get('count')
+    if total_count is None:
+        # Without a total count the number of pages is unknown: follow the
+        # 'next' links one page at a time
+        logger.warning("DVF response has no 'count', fetching remaining pages sequentially")
+        data = first_page
+        page = 1
+        while data.get('next'):
+            page += 1
+            data = _fetch_dvf_page(params, page)
+            page_results = data.get('results', [])
+            total_entries += len(page_results)
+            yield from page_results
+        logger.info(f"Completed fetching all pages ({page}). Total entries: {total_entries}")
+        return
+
+    # Page size is not advertised by the API, infer it from the first page
+    page_size = total_entries
+    del first_page, page_results
+    total_pages = -(-total_count // page_size)
+    remaining_pages = iter(range(2, total_pages + 1))
+    with ThreadPoolExecutor(max_workers=DVF_MAX_CONCURRENT_PAGES) as executor:
+        # Keep a bounded window of pages in flight and consume them in page order,
+        # so the API ordering is kept and at most a window of pages is buffered
+        pending = deque(
+            executor.submit(_fetch_dvf_page, params, page)
+            for page in islice(remaining_pages, DVF_MAX_CONCURRENT_PAGES)
+        )
+        while pending:
+            data = pending.popleft().result()
+            next_page = next(remaining_pages, None)
+            if next_page is not None:
+                pending.append(executor.submit(_fetch_dvf_page, params, next_page))
+
+            page_results = data.get('results', [])
+            total_entries += len(page_results)
+            del data
+            yield from page_results
+
+    logger.info(f"Completed fetching all pages ({total_pages}). Total entries: {total_entries}")
+
+def iter_dvf_entries(bbox: str, min_year: str, max_year: Optional[int] = None,
+                     property_type_codes: Optional[str] = None,
+                     min_value: float = DVF_MIN_VALUE, min_built_area: float = DVF_MIN_BUILT_AREA,
+                     vefa_only: bool = False) -> Iterator[Dict[str, Any]]:
     """
     Query the DVF API for all pages of results within the given bounding box and minimum mutation year.
-    Uses precise filters to improve data quality.
-    Implements timeout and retry mechanism with exponential backoff.
+    Uses precise filters to improve data quality; all filtering is done server-side
+    so rejected mutations are never transferred.
+    Entries are streamed page by page so the whole raw result set never needs to be held at once.
 
     Args:
         bbox: String representing the bounding box 'lon_min,lat_min,lon_max,lat_max'
         min_year: String representing the minimum year for mutations
+        max_year: Maximum year for mutations (optional)
+        property_type_codes: Comma-separated codtypbien codes, e.g. '111,121' (optional)
+        min_value: Minimum property value in €
+        min_built_area: Minimum built area in m²
+        vefa_only: Only return VEFA sales (sale in future state of completion)
 
     Returns:
-        List of all results from the DVF API
+        Iterator over all results from the DVF API, in API order
 
     Raises:
-        APIError: If the API request fails after all retries
+        ValidationError: If the bounding box or minimum year is missing
+        APIError: If the API request fails after all retries (raised while iterating)
     """
     if not bbox or not min_year:
         raise ValidationError("Bounding box and minimum year are required")
 
-    api_url = DVF_API_BASE_URL
     params = {
         'in_bbox': bbox,
         'anneemut_min': min_year,
         'fields': 'all',  # Get all available fields
         'format': 'json',  # JSON format for precision
-        'valeurfonc_min': 10000,  # Exclude very low values (likely errors)
-        'sbati_min': 10,  # Exclude very small surfaces (likely errors)
+        'valeurfonc_min': min_value,  # Exclude very low values (likely errors)
+        'sbati_min': min_built_area,  # Exclude very small surfaces (likely errors)
         'ordering': '-anneemut,-datemut'  # Sort by year and date descending
     }
+    if max_year is not None:
+        params['anneemut_max'] = max_year
+    if property_type_codes:
+        params['codtypbien'] = property_type_codes
+    if vefa_only:
+        params['vefa'] = 'true'
+    return _iter_dvf_pages(params)
+
+def fetch_all_pages_dvf_api(bbox: str, min_year: str, **filters: Any) -> List[Dict[str, Any]]:
+    """
+    Query the DVF API for all pages of results and return them as a list.
+    See iter_dvf_entries() for a streaming variant.
 
-    results = []
-    page_count = 0
-    max_retries = 3
-    
-    while True:
-        retries = max_retries
-        while retries > 0:
-            try:
-                logger.info(f"Fetching DVF data page {page_count + 1}...")
-                response = requests.get(api_url, params=params, timeout=DEFAULT_TIMEOUT)
-                response.raise_for_status()
-                data = response.json()
-                page_results = data.get('results', [])
-
-                results.extend(page_results)
-                page_count += 1
-                logger.info(f"Successfully fetched {len(page_results)} entries from page {page_count}")
-
-                next_url = data.get('next')
-                if not next_url:
-                    logger.info(f"Completed fetching all pages. Total entries: {len(results)}")
-                    return results
-
-                # Update the API URL with the next URL for the subsequent request
-                api_url = next_url
-                # Clear params since the next URL will include them
-                params = {}
-                break
-                    
-            except requests.exceptions.HTTPError as e:
-                if e.response.status_code == 403:
-                    logger.error("Area too large for DVF API (max 0.02° × 0.02°)")
-                    raise APIError(f"Area too large for DVF API: {e.response.text}")
-                else:
-                    retries -= 1
-                    if retries > 0:
-                        wait_time = 2 ** (MAX_RETRIES - retries)
-                        logger.warning(f"HTTP error {e.response.status_code}. Retrying in {wait_time}s... ({retries} left)")
-                        time.sleep(wait_time)
-                    else:
-                        raise APIError(f"HTTP error after {MAX_RETRIES} attempts: {e}")
-
-            except requests.exceptions.RequestException as e:
-                retries -= 1
-                if retries > 0:
-                    wait_time = 2 ** (MAX_RETRIES - retries)
-                    logger.warning(f"Request failed: {e}. Retrying in {wait_time}s... ({retries} left)")
-                    time.sleep(wait_time)
-                else:
-                    raise APIError(f"Request failed after {MAX_RETRIES} attempts: {e}")
-    
-    return results
+    Args:
+        bbox: String representing the bounding box 'lon_min,lat_min,lon_max,lat_max'
+        min_year: String representing the minimum year for mutations
+        **filters: Additional filters accepted by iter_dvf_entries()
+
+    Returns:
+        List of all results from the DVF API, in API order
+
+    Raises:
+        APIError: If the API request fails after all retries
+    """
+    return list(iter_dvf_entries(bbox, min_year, **filters))
 
 def get_location_info_by_mutation_id(mutation_id: str) -> Optional[Dict[str, Any]]:
     """
@@ -336,59 +581,75 @@ def get_location_info_by_mutation_id(mutation_id: str) -> Optional[Dict[str, Any
         raise ValidationError("Mutation ID cannot be empty")
 
     api_url = f"{DVF_API_BASE_URL}{mutation_id}/"
-    retries = MAX_RETRIES
 
-    while retries > 0:
-        try:
-            logger.info(f"Searching for location info of mutation ID: {mutation_id}...")
-            response = requests.get(api_url, timeout=DEFAULT_TIMEOUT)
-            response.raise_for_status()
-            mutation = response.json()
-            return {
-                'mutation_id': mutation.get('idmutation'),
-                'parcel_ids': mutation.get('l_idpar', []),
-                'mutated_parcel_ids': mutation.get('l_idparmut', []),
-                'cadastral_sections': mutation.get('l_section', []),
-                'mutation_date': mutation.get('datemut'),
-                'mutation_year': mutation.get('anneemut'),
-                'department_code': mutation.get('coddep'),
-                'insee_codes': mutation.get('l_codinsee', []),
-                'property_type': mutation.get('libtypbien'),
-                'land_value': mutation.get('valeurfonc'),
-                'built_area': mutation.get('sbati'),
-                'land_area': mutation.get('sterr')
-            }
+    try:
+        logger.info(f"Searching for location info of mutation ID: {mutation_id}...")
+        response = _SESSION.get(api_url, timeout=DEFAULT_TIMEOUT)
+        response.raise_for_status()
+        mutation = json_loads(response.content)
+        return {
+            'mutation_id': mutation.get('idmutation'),
+            'parcel_ids': mutation.get('l_idpar', []),
+            'mutated_parcel_ids': mutation.get('l_idparmut', []),
+            'cadastral_sections': mutation.get('l_section', []),
+            'mutation_date': mutation.get('datemut'),
+            'mutation_year': mutation.get('anneemut'),
+            'department_code': mutation.get('coddep'),
+            'insee_codes': mutation.get('l_codinsee', []),
+            'property_type': mutation.get('libtypbien'),
+            'land_value': mutation.get('valeurfonc'),
+            'built_area': mutation.get('sbati'),
+            'land_area': mutation.get('sterr')
+        }
 
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 404:
-                logger.warning(f"Mutation ID {mutation_id} not found")
-                return None
-            retries -= 1
-            if retries > 0:
-                wait_time = 2 ** (MAX_RETRIES - retries)
-                logger.warning(f"HTTP error. Retrying in {wait_time}s... ({retries} left)")
-                time.sleep(wait_time)
-            else:
-                raise APIError(f"HTTP error after {MAX_RETRIES} attempts: {e}")
-
-        except requests.exceptions.RequestException as e:
-            retries -= 1
-            if retries > 0:
-                wait_time = 2 ** (MAX_RETRIES - retries)
-                logger.warning(f"Request failed: {e}. Retrying in {wait_time}s... ({retries} left)")
-                time.sleep(wait_time)
-            else:
-                raise APIError(f"Request failed after {MAX_RETRIES} attempts: {e}")
+    except requests.exceptions.HTTPError as e:
+        if e.response.status_code == 404:
+            logger.warning(f"Mutation ID {mutation_id} not found")
+            return None
+        raise APIError(f"HTTP error: {e}")
+
+    except requests.exceptions.RetryError as e:
+        # Retried statuses (RETRY_STATUS_CODES) still failing after the last attempt
+        raise APIError(f"HTTP error after {MAX_RETRIES} retries: {e}")
 
-    return None
+    except requests.exceptions.RequestException as e:
+        raise APIError(f"Request failed after {MAX_RETRIES} retries: {e}")
 
-def refine_dvf_data(dvf_entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    except ValueError as e:
+        raise APIError(f"Invalid JSON response from DVF API: {e}")
+
+def get_location_info_bulk(mutation_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Retrieve location information for several mutation IDs concurrently.
+
+    Args:
+        mutation_ids: Mutation identifiers to search for
+
+    Returns:
+        Location information for each ID, in the same order (None if not found)
+
+    Raises:
+        APIError: If one of the API requests fails
+    """
+    if not mutation_ids:
+        return []
+
+    with ThreadPoolExecutor(max_workers=DVF_MAX_CONCURRENT_LOOKUPS) as executor:
+        return list(executor.map(get_location_info_by_mutation_id, mutation_ids))
+
+def _intern(value: Any) -> Any:
+    """Intern categorical strings so identical labels share a single object."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+def refine_dvf_data(dvf_entries: Iterable[Dict[str, Any]], keep_raw: bool = False) -> List[Dict[str, Any]]:
     """
     Refine DVF data by exploiting ALL available schema fields.
     Returns precise and detailed raw data.
 
     Args:
-        dvf_entries: List of raw DVF entries
+        dvf_entries: Raw DVF entries, any iterable (consumed once)
+        keep_raw: Keep the source entry under 'raw_entry' (off by default,
+            it roughly doubles memory and keeps every decoded page alive)
 
     Returns:
         List of refined entries with calculated fields
@@ -396,104 +657,108 @@ def refine_dvf_data(dvf_entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     if not dvf_entries:
         return []
     refined_entries = []
+    append = refined_entries.append
+    skipped_ids = []
 
     for entry in dvf_entries:
-        # Extract all available fields
+        get = entry.get
+
+        # Numeric fields, converted once per entry
         try:
-            mutation_id = entry.get('idmutation', '')
-            mutation_date = entry.get('datemut')  # Exact mutation date
-            mutation_year = int(entry.get('anneemut', 0))
-            department_code = entry.get('coddep')
-            insee_codes = entry.get('l_codinsee', [])
-
-            # Financial information
-            land_value = float(entry.get('valeurfonc') or 0.0)
-            land_area = float(entry.get('sterr') or 0.0)
-            built_area = float(entry.get('sbati') or 0.0)
-        except (ValueError, TypeError) as e:
-            logger.warning(f"Data conversion error for entry {entry.get('idmutation', 'unknown')}: {e}")
+            mutation_year = int(get('anneemut', 0))
+            land_value = float(get('valeurfonc') or 0.0)
+            land_area = float(get('sterr') or 0.0)
+            built_area = float(get('sbati') or 0.0)
+            nb_parcels = int(get('nbpar', 0))
+            nb_parcels_mutated = int(get('nbparmut', 0))
+            nb_volumes_mutated = int(get('nbvolmut', 0))
+            nb_locals_mutated = int(get('nblocmut', 0))
+            nb_communes = int(get('nbcomm', 0))
+        except (ValueError, TypeError):
+            skipped_ids.append(get('idmutation', 'unknown'))
             continue
-        
-        # Property type (code and label)
-        property_type_code = entry.get('codtypbien')
-        property_type_label = entry.get('libtypbien')
-
-        # Mutation nature
-        mutation_nature = entry.get('libnatmut')
-
-        # VEFA (Sale in future state of completion)
-        is_vefa = bool(entry.get('vefa', False))
 
-        # Parcel information
-        nb_parcels = int(entry.get('nbpar', 0))
-        nb_parcels_mutated = int(entry.get('nbparmut', 0))
-        parcel_ids = entry.get('l_idpar', [])
-        mutated_parcel_ids = entry.get('l_idparmut', [])
+        # Prices per m² only when both value and surface are known
+        has_value = land_value > 0
+        price_per_m2 = round(land_value / built_area, 2) if has_value and built_area > 0 else None
+        price_per_m2_land = round(land_value / land_area, 2) if has_value and land_area > 0 else None
 
-        # Volume and property information
-        nb_volumes_mutated = int(entry.get('nbvolmut', 0))
-        nb_locals_mutated = int(entry.get('nblocmut', 0))
-        local_ids = entry.get('l_idlocmut', [])
-
-        # Number of municipalities
-        nb_communes = int(entry.get('nbcomm', 0))
-        
-        # Calculate price per m² only if surface > 0
-        price_per_m2 = None
-        if built_area > 0 and land_value > 0:
-            price_per_m2 = round(land_value / built_area, 2)
-
-        # Calculate land price per m² if land > 0
-        price_per_m2_land = None
-        if land_area > 0 and land_value > 0:
-            price_per_m2_land = round(land_value / land_area, 2)
-        
         # Création de l'entrée raffinée avec TOUTES les données
         refined_entry = {
             # Identifiants
-            'mutation_id': mutation_id,
-            'mutation_date': mutation_date,
+            'mutation_id': get('idmutation', ''),
+            'mutation_date': get('datemut'),  # Exact mutation date
             'mutation_year': mutation_year,
-            
+
             # Géographie
-            'department_code': department_code,
-            'insee_codes': insee_codes,
+            'department_code': _intern(get('coddep')),
+            'insee_codes': [_intern(code) for code in get('l_codinsee') or []],
             'nb_communes': nb_communes,
-            
+
             # Financier
             'land_value': land_value,
             'land_area': land_area,
             'built_area': built_area,
             'price_per_m2': price_per_m2,
             'price_per_m2_land': price_per_m2_land,
-            
+
             # Type de bien
-            'property_type_code': property_type_code,
-            'property_type_label': property_type_label,
-            
-            # Nature de mutation
-            'mutation_nature': mutation_nature,
-            'is_vefa': is_vefa,
-            
+            'property_type_code': _intern(get('codtypbien')),
+            'property_type_label': _intern(get('libtypbien')),
+
+            # Nature de mutation (VEFA: Sale in future state of completion)
+            'mutation_nature': _intern(get('libnatmut')),
+            'is_vefa': bool(get('vefa', False)),
+
             # Parcelles
             'nb_parcels': nb_parcels,
             'nb_parcels_mutated': nb_parcels_mutated,
-            'parcel_ids': parcel_ids,
-            'mutated_parcel_ids': mutated_parcel_ids,
-            
+            'parcel_ids': get('l_idpar', []),
+            'mutated_parcel_ids': get('l_idparmut', []),
+
             # Volumes et locaux
             'nb_volumes_mutated': nb_volumes_mutated,
             'nb_locals_mutated': nb_locals_mutated,
-            'local_ids': local_ids,
-            
-            # Métadonnées
-            'raw_entry': entry  # Conservation de l'entrée brute pour référence
+            'local_ids': get('l_idlocmut', [])
         }
-        
-        refined_entries.append(refined_entry)
-    
+
+        # Métadonnées : conservation de l'entrée brute, uniquement sur demande
+        if keep_raw:
+            refined_entry['raw_entry'] = entry
+
+        append(refined_entry)
+
+    if skipped_ids:
+        sample = ', '.join(str(mutation_id) for mutation_id in skipped_ids[:5])
+        logger.warning(f"Skipped {len(skipped_ids)} entries with invalid numeric data (e.g. {sample})")
+
     return refined_entries
 
+def _describe(values: List[float]) -> Dict[str, float]:
+    """Mean, median, min and max of a non-empty list, from a single sort."""
+    ordered = sorted(values)
+    count = len(ordered)
+    return {
+        'mean': sum(values) / count,
+        'median': ordered[count // 2],
+        'min': ordered[0],
+        'max': ordered[-1]
+    }
+
+def _std_dev(values: List[float], mean: float) -> float:
+    """Population standard deviation around a precomputed mean."""
+    deviations = [v - mean for v in values]
+    return (sum(map(operator.mul, deviations, deviations)) / len(values)) ** 0.5
+
+def _average_prices(count: int, valid_entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Average price per m² and value of a group with at least one valid price."""
+    return {
+        'count': count,
+        'valid_price_count': len(valid_entries),
+        'avg_price_per_m2': sum(e['price_per_m2'] for e in valid_entries) / len(valid_entries),
+        'avg_land_value': sum(e['land_value'] for e in valid_entries) / len(valid_entries)
+    }
+
 def calculate_comprehensive_statistics(refined_entries):
     """
     Calcule des statistiques agrégées robustes basées sur toutes les données disponibles.
@@ -501,20 +766,52 @@ def calculate_comprehensive_statistics(refined_entries):
     if not refined_entries:
         return {}
     
-    # Filtrage des données valides pour les calculs de prix
-    valid_price_data = [e for e in refined_entries if e['price_per_m2'] is not None and e['price_per_m2'] > 0]
-    valid_land_price_data = [e for e in refined_entries if e['price_per_m2_land'] is not None and e['price_per_m2_land'] > 0]
-    
+    # Regroupement en une seule passe : chaque groupe garde [nombre total, entrées avec prix valide]
+    property_types = defaultdict(lambda: [0, []])
+    mutation_natures = defaultdict(lambda: [0, []])
+    vefa_groups = {True: [0, []], False: [0, []]}
+    departments = defaultdict(int)
+    communes = defaultdict(int)
+    valid_price_data = []
+    valid_land_price_count = 0
+    min_year = max_year = None
+
+    for entry in refined_entries:
+        price = entry['price_per_m2']
+        is_valid = price is not None and price > 0
+        land_price = entry['price_per_m2_land']
+        if land_price is not None and land_price > 0:
+            valid_land_price_count += 1
+
+        year = entry['mutation_year']
+        if min_year is None or year < min_year:
+            min_year = year
+        if max_year is None or year > max_year:
+            max_year = year
+
+        for bucket in (property_types[entry['property_type_label']],
+                       mutation_natures[entry['mutation_nature']],
+                       vefa_groups[bool(entry['is_vefa'])]):
+            bucket[0] += 1
+            if is_valid:
+                bucket[1].append(entry)
+        if is_valid:
+            valid_price_data.append(entry)
+
+        departments[entry['department_code']] += 1
+        for insee_code in entry['insee_codes']:
+            communes[insee_code] += 1
+
     stats = {
         # Métadonnées générales
         'total_transactions': len(refined_entries),
         'valid_price_transactions': len(valid_price_data),
-        'valid_land_price_transactions': len(valid_land_price_data),
+        'valid_land_price_transactions': valid_land_price_count,
         
         # Période d'analyse
         'year_range': {
-            'min': min(e['mutation_year'] for e in refined_entries) if refined_entries else None,
-            'max': max(e['mutation_year'] for e in refined_entries) if refined_entries else None
+            'min': min_year,
+            'max': max_year
         },
         
         # Statistiques financières globales
@@ -539,127 +836,74 @@ def calculate_comprehensive_statistics(refined_entries):
         land_values = [e['land_value'] for e in valid_price_data]
         built_areas = [e['built_area'] for e in valid_price_data]
         
+        price_stats = _describe(prices)
+        price_stats['std_dev'] = _std_dev(prices, price_stats['mean']) if len(prices) > 1 else 0
+        land_value_stats = _describe(land_values)
+        land_value_stats['total'] = sum(land_values)
+        built_area_stats = _describe(built_areas)
+        built_area_stats['total'] = sum(built_areas)
+
         stats['financial_stats'] = {
-            'price_per_m2': {
-                'mean': sum(prices) / len(prices),
-                'median': sorted(prices)[len(prices)//2] if prices else 0,
-                'min': min(prices),
-                'max': max(prices),
-                'std_dev': (sum((p - sum(prices)/len(prices))**2 for p in prices) / len(prices))**0.5 if len(prices) > 1 else 0
-            },
-            'land_value': {
-                'mean': sum(land_values) / len(land_values),
-                'median': sorted(land_values)[len(land_values)//2] if land_values else 0,
-                'min': min(land_values),
-                'max': max(land_values),
-                'total': sum(land_values)
-            },
-            'built_area': {
-                'mean': sum(built_areas) / len(built_areas),
-                'median': sorted(built_areas)[len(built_areas)//2] if built_areas else 0,
-                'min': min(built_areas),
-                'max': max(built_areas),
-                'total': sum(built_areas)
-            }
+            'price_per_m2': price_stats,
+            'land_value': land_value_stats,
+            'built_area': built_area_stats
         }
     
     # Statistiques par type de bien
-    property_types = {}
-    for entry in refined_entries:
-        prop_type = entry['property_type_label']
-        if prop_type not in property_types:
-            property_types[prop_type] = []
-        property_types[prop_type].append(entry)
-    
-    for prop_type, entries in property_types.items():
-        valid_entries = [e for e in entries if e['price_per_m2'] is not None and e['price_per_m2'] > 0]
+    for prop_type, (count, valid_entries) in property_types.items():
         if valid_entries:
             prices = [e['price_per_m2'] for e in valid_entries]
             stats['by_property_type'][prop_type] = {
-                'count': len(entries),
+                'count': count,
                 'valid_price_count': len(valid_entries),
-                'price_per_m2': {
-                    'mean': sum(prices) / len(prices),
-                    'median': sorted(prices)[len(prices)//2],
-                    'min': min(prices),
-                    'max': max(prices)
-                },
+                'price_per_m2': _describe(prices),
                 'avg_built_area': sum(e['built_area'] for e in valid_entries) / len(valid_entries),
                 'avg_land_value': sum(e['land_value'] for e in valid_entries) / len(valid_entries)
             }
     
     # Statistiques par nature de mutation
-    mutation_natures = {}
-    for entry in refined_entries:
-        nature = entry['mutation_nature']
-        if nature not in mutation_natures:
-            mutation_natures[nature] = []
-        mutation_natures[nature].append(entry)
-    
-    for nature, entries in mutation_natures.items():
-        valid_entries = [e for e in entries if e['price_per_m2'] is not None and e['price_per_m2'] > 0]
+    for nature, (count, valid_entries) in mutation_natures.items():
         if valid_entries:
-            prices = [e['price_per_m2'] for e in valid_entries]
-            stats['by_mutation_nature'][nature] = {
-                'count': len(entries),
-                'valid_price_count': len(valid_entries),
-                'avg_price_per_m2': sum(prices) / len(prices),
-                'avg_land_value': sum(e['land_value'] for e in valid_entries) / len(valid_entries)
-            }
+            stats['by_mutation_nature'][nature] = _average_prices(count, valid_entries)
     
     # Statistiques VEFA vs classique
-    vefa_entries = [e for e in refined_entries if e['is_vefa']]
-    classic_entries = [e for e in refined_entries if not e['is_vefa']]
-    
-    if vefa_entries:
-        valid_vefa = [e for e in vefa_entries if e['price_per_m2'] is not None and e['price_per_m2'] > 0]
-        if valid_vefa:
-            vefa_prices = [e['price_per_m2'] for e in valid_vefa]
-            stats['vefa_vs_classic']['vefa'] = {
-                'count': len(vefa_entries),
-                'valid_price_count': len(valid_vefa),
-                'avg_price_per_m2': sum(vefa_prices) / len(vefa_prices),
-                'avg_land_value': sum(e['land_value'] for e in valid_vefa) / len(valid_vefa)
-            }
-    
-    if classic_entries:
-        valid_classic = [e for e in classic_entries if e['price_per_m2'] is not None and e['price_per_m2'] > 0]
-        if valid_classic:
-            classic_prices = [e['price_per_m2'] for e in valid_classic]
-            stats['vefa_vs_classic']['classic'] = {
-                'count': len(classic_entries),
-                'valid_price_count': len(valid_classic),
-                'avg_price_per_m2': sum(classic_prices) / len(classic_prices),
-                'avg_land_value': sum(e['land_value'] for e in valid_classic) / len(valid_classic)
-            }
+    for label, is_vefa in (('vefa', True), ('classic', False)):
+        count, valid_entries = vefa_groups[is_vefa]
+        if valid_entries:
+            stats['vefa_vs_classic'][label] = _average_prices(count, valid_entries)
     
     # Statistiques géographiques
-    departments = {}
-    communes = {}
-    for entry in refined_entries:
-        dept = entry['department_code']
-        if dept not in departments:
-            departments[dept] = []
-        departments[dept].append(entry)
-        
-        for insee_code in entry['insee_codes']:
-            if insee_code not in communes:
-                communes[insee_code] = []
-            communes[insee_code].append(entry)
-    
     stats['geographic_stats'] = {
-        'departments': {dept: len(entries) for dept, entries in departments.items()},
-        'communes': {commune: len(entries) for commune, entries in communes.items()},
+        'departments': dict(departments),
+        'communes': dict(communes),
         'nb_unique_departments': len(departments),
         'nb_unique_communes': len(communes)
     }
     
     return stats
 
-def print_comprehensive_data_table(refined_entries, period_months=24):
+def _fmt_eur(amount: Optional[float]) -> str:
+    """Format a euro amount rounded to the unit, e.g. 12,345 ('N/A' if missing)."""
+    return "N/A" if amount is None else f"{amount:,.0f}"
+
+# En-têtes et alignement du tableau des transactions
+DVF_TABLE_HEADERS = [
+    'Date', 'Valeur (€)', 'Surface Terrain (m²)', 'Surface Bâtie (m²)',
+    'Prix/m² Bâti (€)', 'Prix/m² Terrain (€)', 'Type Bien',
+    'Nb Parcelles', 'Nb Locaux'
+]
+DVF_TABLE_COLALIGN = ('left', 'right', 'right', 'right', 'right', 'right', 'left', 'right', 'right')
+
+def print_comprehensive_data_table(refined_entries, period_months=24, max_rows=None):
     """
     Display a detailed table with all available raw data.
+    Only the max_rows most recent transactions are shown when max_rows is set.
+
+    Raises:
+        ValidationError: If max_rows is set and lower than 1
     """
+    if max_rows is not None and max_rows < 1:
+        raise ValidationError("max_rows must be at least 1")
     if not refined_entries:
         print("Aucune donnée disponible.")
         return
@@ -668,60 +912,45 @@ def print_comprehensive_data_table(refined_entries, period_months=24):
     sorted_entries = sorted(refined_entries, 
                           key=lambda x: (x['mutation_year'], x['mutation_date'] or ''), 
                           reverse=True)
+    if max_rows is not None:
+        sorted_entries = sorted_entries[:max_rows]
     
-    # Préparation des données pour le tableau
+    # Préparation des données pour le tableau (cellules déjà formatées en texte)
     table_data = []
     for entry in sorted_entries:
-        # Formatage des données pour l'affichage
-        mutation_date_str = entry['mutation_date'] or f"{entry['mutation_year']}"
-        insee_str = ', '.join(entry['insee_codes']) if entry['insee_codes'] else 'N/A'
-        # Création d'une adresse approximative à partir des données disponibles
-        parcel_str = ', '.join(entry['parcel_ids'][:2]) if entry['parcel_ids'] else 'N/A'
-        
-        price_per_m2_str = f"{entry['price_per_m2']:,.0f}" if entry['price_per_m2'] else "N/A"
-        price_per_m2_land_str = f"{entry['price_per_m2_land']:,.0f}" if entry['price_per_m2_land'] else "N/A"
-        
-        vefa_str = "Oui" if entry['is_vefa'] else "Non"
-        
+        price_per_m2 = entry['price_per_m2']
+        price_per_m2_land = entry['price_per_m2_land']
         table_data.append([
-            mutation_date_str,
-            f"{entry['land_value']:,.0f}",
+            entry['mutation_date'] or f"{entry['mutation_year']}",
+            _fmt_eur(entry['land_value']),
             f"{entry['land_area']:.0f}",
             f"{entry['built_area']:.0f}",
-            price_per_m2_str,
-            price_per_m2_land_str,
+            _fmt_eur(price_per_m2),
+            _fmt_eur(price_per_m2_land),
             entry['property_type_label'] or 'N/A',
             entry['nb_parcels'],
             entry['nb_locals_mutated']
         ])
     
-    # En-têtes du tableau
-    headers = [
-        'Date', 'Valeur (€)', 'Surface Terrain (m²)', 'Surface Bâtie (m²)',
-        'Prix/m² Bâti (€)', 'Prix/m² Terrain (€)', 'Type Bien',
-        'Nb Parcelles', 'Nb Locaux'
-    ]
-    
     if table_data:
-        actual_min_year = min(e['mutation_year'] for e in refined_entries)
-        actual_max_year = max(e['mutation_year'] for e in refined_entries)
-        current_date = datetime.now()
-        requested_start = current_date - timedelta(days=period_months * 30.44)
-
         # Get actual date range from data
         all_dates = [e['mutation_date'] for e in refined_entries if e['mutation_date']]
         if all_dates:
-            actual_start = min(all_dates)
-            actual_end = max(all_dates)
-            data_coverage = f"{actual_start} to {actual_end}"
+            data_coverage = f"{min(all_dates)} to {max(all_dates)}"
         else:
+            actual_min_year = min(e['mutation_year'] for e in refined_entries)
+            actual_max_year = max(e['mutation_year'] for e in refined_entries)
             data_coverage = f"{actual_min_year} - {actual_max_year}"
 
-        print(f"\n📋 Property transactions found: {len(table_data)} records")
+        print(f"\n📋 Property transactions found: {len(refined_entries)} records")
+        if len(table_data) < len(refined_entries):
+            print(f"🔎 Showing the {len(table_data)} most recent transactions")
         print(f"📅 Data coverage: {data_coverage}")
         print(f"🎯 Analysis period: {period_months} months back")
         print("\n" + "="*120)
-        print(tabulate(table_data, headers=headers, tablefmt='fancy_grid'))
+        # Cells are pre-formatted, skip tabulate's per-cell number detection
+        print(tabulate(table_data, headers=DVF_TABLE_HEADERS, tablefmt='fancy_grid',
+                       disable_numparse=True, colalign=DVF_TABLE_COLALIGN))
         print("="*120)
     else:
         print(f"\n⚠️  No property transaction data found for this location.")
@@ -746,10 +975,10 @@ def print_comprehensive_statistics(stats):
     if stats['financial_stats']:
         fs = stats['financial_stats']
         print(f"\n💰 FINANCIAL ANALYSIS")
-        print(f"• Average price per m²: €{fs['price_per_m2']['mean']:,.0f}")
-        print(f"• Median price per m²: €{fs['price_per_m2']['median']:,.0f}")
-        print(f"• Price range: €{fs['price_per_m2']['min']:,.0f} - €{fs['price_per_m2']['max']:,.0f}")
-        print(f"• Average property value: €{fs['land_value']['mean']:,.0f}")
+        print(f"• Average price per m²: €{_fmt_eur(fs['price_per_m2']['mean'])}")
+        print(f"• Median price per m²: €{_fmt_eur(fs['price_per_m2']['median'])}")
+        print(f"• Price range: €{_fmt_eur(fs['price_per_m2']['min'])} - €{_fmt_eur(fs['price_per_m2']['max'])}")
+        print(f"• Average property value: €{_fmt_eur(fs['land_value']['mean'])}")
         print(f"• Average built area: {fs['built_area']['mean']:.0f}m²")
 
     # Property type breakdown
@@ -758,7 +987,7 @@ def print_comprehensive_statistics(stats):
         for prop_type, data in stats['by_property_type'].items():
             percentage = (data['count'] / stats['total_transactions']) * 100
             print(f"• {prop_type}: {data['count']} transactions ({percentage:.1f}%)")
-            print(f"  - Average price: €{data['price_per_m2']['mean']:,.0f}/m²")
+            print(f"  - Average price: €{_fmt_eur(data['price_per_m2']['mean'])}/m²")
             print(f"  - Average size: {data['avg_built_area']:.0f}m²")
 
     # Geographic distribution
@@ -772,131 +1001,87 @@ def print_comprehensive_statistics(stats):
     if stats['by_mutation_nature']:
         print(f"\n📋 TRANSACTION TYPES")
         for nature, data in stats['by_mutation_nature'].items():
-            print(f"• {nature}: {data['count']} transactions (avg: €{data['avg_price_per_m2']:,.0f}/m²)")
+            print(f"• {nature}: {data['count']} transactions (avg: €{_fmt_eur(data['avg_price_per_m2'])}/m²)")
 
     print("\n" + "="*80)
 
-def calculate_average_price_by_type(data, property_type):
-    # Filter data by property type and ensure that the area and price are positive
-    filtered_entries = [
-        entry for entry in data
-        if entry['property_type'] == property_type and entry['built_area'] > 0 and entry['land_value'] > 0
-    ]
-
-    # Check if the filtered list is empty
-    if not filtered_entries:
-        return None
-
-    # Calculate the total price and total area for the specified property type
-    total_price = sum(entry['land_value'] for entry in filtered_entries)
-    total_area = sum(entry['built_area'] for entry in filtered_entries)
-
-    # Calculate the average price per m2
-    average_price_per_m2 = total_price / total_area if total_area > 0 else None
-
-    return average_price_per_m2
-
-def calculate_median_price_by_type(data, property_type):
-    # Filter data by property type and ensure that the area and price are positive
-    filtered_entries = [
-        entry for entry in data
-        if entry['property_type'] == property_type and entry['built_area'] > 0 and entry['land_value'] > 0
-    ]
-
-    # Extract the prices per m2 for the specified property type
-    prices_per_m2_list = [entry['price_per_m2'] for entry in filtered_entries]
-
-    # Check if the list of prices is empty
-    if not prices_per_m2_list:
-        return None
-
-    # Calculate the median price per m2
-    prices_per_m2_list.sort()
-    mid = len(prices_per_m2_list) // 2
-    if len(prices_per_m2_list) % 2:
-        # If odd, take the middle element
-        median_price_per_m2 = prices_per_m2_list[mid]
-    else:
-        # If even, take the average of the two middle elements
-        median_price_per_m2 = (prices_per_m2_list[mid - 1] + prices_per_m2_list[mid]) / 2
-
-    return median_price_per_m2
-
-def print_average_and_median_prices_table(average_price_per_m2_apartments, average_price_per_m2_houses, median_price_per_m2_apartments, median_price_per_m2_houses):
-    # Define the headers for the table
-    headers = ['Property Type', 'Average Price per m2 (€)', 'Median Price per m2 (€)']
-
-    # Create a list of data rows for the table
-    table_data = [
-        ['Apartments', f"{round(average_price_per_m2_apartments):,.0f}" if average_price_per_m2_apartments is not None else "N/A",
-         f"{round(median_price_per_m2_apartments):,.0f}" if median_price_per_m2_apartments is not None else "N/A"],
-        ['Houses', f"{round(average_price_per_m2_houses):,.0f}" if average_price_per_m2_houses is not None else "N/A",
-         f"{round(median_price_per_m2_houses):,.0f}" if median_price_per_m2_houses is not None else "N/A"]
-    ]
-
-    # Print the table
-    print(tabulate(table_data, headers=headers, tablefmt='fancy_grid'))
-
-def calculate_average_price_by_type(data, property_type):
-    # Filter data by property type and ensure that the area and price are positive
-    filtered_entries = [
-        entry for entry in data
-        if entry['property_type_label'] == property_type and entry['built_area'] > 0 and entry['land_value'] > 0
-    ]
-
-    # Check if the filtered list is empty
-    if not filtered_entries:
-        return None
-
-    # Calculate the total price and total area for the specified property type
-    total_price = sum(entry['land_value'] for entry in filtered_entries)
-    total_area = sum(entry['built_area'] for entry in filtered_entries)
+def dvf_to_arrays(refined_entries, key='property_type_label') -> DvfColumns:
+    """
+    Extract the columns used by the per-type price aggregators, in a single pass.
+    Build them once and pass them to compute_price_stats() or the
+    calculate_*_price_by_type helpers.
 
-    # Calculate the average price per m2
-    average_price_per_m2 = total_price / total_area if total_area > 0 else None
+    Args:
+        refined_entries: List of refined DVF entries
+        key: Entry field holding the property type
 
-    return average_price_per_m2
+    Returns:
+        DvfColumns with one contiguous array per numeric field
+    """
+    columns = DvfColumns(array('d'), array('d'), array('d'), [])
+    for entry in refined_entries:
+        columns.built_area.append(entry['built_area'])
+        columns.land_value.append(entry['land_value'])
+        price_per_m2 = entry['price_per_m2']
+        columns.price_per_m2.append(price_per_m2 if price_per_m2 is not None else math.nan)
+        columns.property_type.append(entry[key])
+    return columns
+
+def compute_price_stats(columns: DvfColumns, property_types: Iterable[str]) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+    """
+    Weighted average and median price per m² of several property types, in a single pass.
+    Entries are grouped by property type once instead of scanning the columns
+    for each type and each statistic. The average is weighted by built area
+    (total value / total area); the median is the one used by the
+    comprehensive statistics (_describe).
 
-def calculate_median_price_by_type(data, property_type):
-    # Filter data by property type and ensure that the area and price are positive
-    filtered_entries = [
-        entry for entry in data
-        if entry['property_type_label'] == property_type and entry['built_area'] > 0 and entry['land_value'] > 0
-    ]
+    Args:
+        columns: Columns returned by dvf_to_arrays()
+        property_types: Property type labels to select, e.g.
+            (DVF_APARTMENT_LABEL, DVF_HOUSE_LABEL)
 
-    # Extract the prices per m2 for the specified property type
-    prices_per_m2_list = [entry['price_per_m2'] for entry in filtered_entries]
+    Returns:
+        Dict mapping each property type to (weighted average price per m², median price per m²),
+        (None, None) if no entry of that type has a positive area and price
+    """
+    # Per type: [total price, total area, prices per m²]
+    buckets = {property_type: [0.0, 0.0, []] for property_type in property_types}
+    get_bucket = buckets.get
+    for ptype, area, value, price_per_m2 in zip(columns.property_type, columns.built_area,
+                                                columns.land_value, columns.price_per_m2):
+        bucket = get_bucket(ptype)
+        if bucket is not None and area > 0 and value > 0:
+            bucket[0] += value
+            bucket[1] += area
+            bucket[2].append(price_per_m2)
+
+    return {
+        property_type: (total_price / total_area, _describe(prices)['median'])
+        if total_area > 0 else (None, None)
+        for property_type, (total_price, total_area, prices) in buckets.items()
+    }
 
-    # Check if the list of prices is empty
-    if not prices_per_m2_list:
-        return None
+def calculate_average_price_by_type(columns: DvfColumns, property_type):
+    # Area-weighted average price per m2 (None if no entry matched), columns
+    # come from dvf_to_arrays(); use compute_price_stats() for several types
+    return compute_price_stats(columns, (property_type,))[property_type][0]
 
-    # Calculate the median price per m2
-    prices_per_m2_list.sort()
-    mid = len(prices_per_m2_list) // 2
-    if len(prices_per_m2_list) % 2:
-        # If odd, take the middle element
-        median_price_per_m2 = prices_per_m2_list[mid]
-    else:
-        # If even, take the average of the two middle elements
-        median_price_per_m2 = (prices_per_m2_list[mid - 1] + prices_per_m2_list[mid]) / 2
+def calculate_median_price_by_type(columns: DvfColumns, property_type):
+    # Median price per m2 (None if no entry matched), columns come from
+    # dvf_to_arrays(); use compute_price_stats() for several types
+    return compute_price_stats(columns, (property_type,))[property_type][1]
 
-    return median_price_per_m2
+PRICE_TABLE_HEADERS = ('Property Type', 'Weighted Avg Price per m2 (€)', 'Median Price per m2 (€)')
 
 def print_average_and_median_prices_table(average_price_per_m2_apartments, average_price_per_m2_houses, median_price_per_m2_apartments, median_price_per_m2_houses):
-    # Define the headers for the table
-    headers = ['Property Type', 'Average Price per m2 (€)', 'Median Price per m2 (€)']
-
     # Create a list of data rows for the table
     table_data = [
-        ['Apartments', f"{round(average_price_per_m2_apartments):,.0f}" if average_price_per_m2_apartments is not None else "N/A",
-         f"{round(median_price_per_m2_apartments):,.0f}" if median_price_per_m2_apartments is not None else "N/A"],
-        ['Houses', f"{round(average_price_per_m2_houses):,.0f}" if average_price_per_m2_houses is not None else "N/A",
-         f"{round(median_price_per_m2_houses):,.0f}" if median_price_per_m2_houses is not None else "N/A"]
+        ['Apartments', _fmt_eur(average_price_per_m2_apartments), _fmt_eur(median_price_per_m2_apartments)],
+        ['Houses', _fmt_eur(average_price_per_m2_houses), _fmt_eur(median_price_per_m2_houses)]
     ]
 
     # Print the table
-    print(tabulate(table_data, headers=headers, tablefmt='fancy_grid'))
+    print(tabulate(table_data, headers=PRICE_TABLE_HEADERS, tablefmt='fancy_grid'))
 
 # Define the amenities for each category
 CULTURAL_AND_EDUCATIONAL_AMENITIES = [
@@ -944,25 +1129,136 @@ BUSINESS_AND_FINANCE_AMENITIES = [
     ("amenity", "conference_centre"), ("amenity", "business_centre"), ("amenity", "marketplace")
 ]
 
-# Parse command-line arguments
-parser = argparse.ArgumentParser(description='GeoSpotlight - Analyse géospatiale des quartiers')
-parser.add_argument('--period', type=int, default=24,
-                   help='Période d\'analyse en mois (défaut: 24)')
-parser.add_argument('--test-mutation-id', type=str,
-                   help='Tester la récupération d\'informations pour un ID de mutation spécifique')
-args = parser.parse_args()
+# Display name and tags of each amenity category, in display order
+AMENITY_CATEGORIES = (
+    ("Cultural and Educational", CULTURAL_AND_EDUCATIONAL_AMENITIES),
+    ("Transport", TRANSPORT_AMENITIES),
+    ("Food and Drink", FOOD_AND_DRINK_AMENITIES),
+    ("Healthcare", HEALTHCARE_AMENITIES),
+    ("Business and Finance", BUSINESS_AND_FINANCE_AMENITIES)
+)
+
+# Flat index of every (key, value, category id) tag, category id being the
+# position in AMENITY_CATEGORIES
+ALL_AMENITIES = tuple(
+    (key, value, category_id)
+    for category_id, (_, amenities) in enumerate(AMENITY_CATEGORIES)
+    for key, value in amenities
+)
+AMENITY_CATEGORY_IDS = {(key, value): category_id for key, value, category_id in ALL_AMENITIES}
+
+def sort_places_by_amenity_category(places: Dict[str, Any]) -> List[Dict[str, Set[str]]]:
+    """Categorize the results of an ALL_AMENITIES search, in a single pass.
+
+    Each named element is added to every category owning one of its tags (what a
+    separate search per category would have returned), under the same
+    'key:value' subcategory as sort_places_by_category().
+
+    Args:
+        places: Overpass results for all the ALL_AMENITIES tags
+
+    Returns:
+        One {'key:value': names} dictionary per AMENITY_CATEGORIES entry, in the same order
+    """
+    grouped = [defaultdict(set) for _ in AMENITY_CATEGORIES]
+    for element in places['elements']:
+        tags = element.get("tags")
+        if not tags:
+            continue
+        name = tags.get("name")
+        if not name:  # Only add the place if it has a name
+            continue
+
+        subcategory_key = None
+        matched = set()
+        for key in PLACE_CATEGORY_KEYS:
+            value = tags.get(key)
+            if value:
+                if subcategory_key is None:
+                    subcategory_key = f"{key}:{value}"
+                category_id = AMENITY_CATEGORY_IDS.get((key, value))
+                if category_id is not None and category_id not in matched:
+                    matched.add(category_id)
+                    grouped[category_id][subcategory_key].add(name)
+    return [dict(places_by_category) for places_by_category in grouped]
+
+def subtract_months(date: datetime, months: int) -> datetime:
+    """
+    Subtract a whole number of calendar months from a date.
+
+    The day is clamped to the last day of the target month (e.g. 31 March
+    minus one month gives 28 or 29 February).
+
+    Args:
+        date: Reference date
+        months: Number of months to go back
+
+    Returns:
+        The same day `months` calendar months earlier
+    """
+    year, month_index = divmod(date.year * 12 + date.month - 1 - months, 12)
+    month = month_index + 1
+    day = min(date.day, calendar.monthrange(year, month)[1])
+    return date.replace(year=year, month=month, day=day)
 
-# Calculate minimum year from period in months (24 months by default)
-current_date = datetime.now()
-min_date = current_date - timedelta(days=args.period * 30.44)  # Average days per month
-min_year = str(min_date.year)
+def _positive_int(value: str) -> int:
+    """argparse type accepting strictly positive integers."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"entier attendu : {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"doit être supérieur ou égal à 1 : {number}")
+    return number
+
+def _parse_args(argv: Optional[List[str]] = None) -> Tuple[argparse.Namespace, str]:
+    """
+    Parse command-line arguments and derive the minimum mutation year.
 
-# Calculate minimum year from period in months (24 months by default)
+    Kept out of module scope so that importing the module does not read sys.argv.
 
-def main():
-    """Main function of the script."""
+    Args:
+        argv: Arguments to parse (defaults to sys.argv[1:])
+
+    Returns:
+        Tuple (parsed arguments, minimum mutation year)
+    """
+    parser = argparse.ArgumentParser(description='GeoSpotlight - Analyse géospatiale des quartiers')
+    parser.add_argument('--period', type=int, default=24,
+                       help='Période d\'analyse en mois (défaut: 24)')
+    parser.add_argument('--max-year', type=int,
+                       help='Année de mutation maximale (optionnel)')
+    parser.add_argument('--property-types', type=str,
+                       help='Codes de typologie de bien DVF (codtypbien) séparés par des virgules, ex: 111,121')
+    parser.add_argument('--min-value', type=float, default=DVF_MIN_VALUE,
+                       help=f'Valeur foncière minimale en € (défaut: {DVF_MIN_VALUE})')
+    parser.add_argument('--min-built-area', type=float, default=DVF_MIN_BUILT_AREA,
+                       help=f'Surface bâtie minimale en m² (défaut: {DVF_MIN_BUILT_AREA})')
+    parser.add_argument('--vefa-only', action='store_true',
+                       help='Ne conserver que les ventes en VEFA')
+    parser.add_argument('--max-rows', type=_positive_int,
+                       help='Nombre maximal de transactions affichées dans le tableau (défaut: toutes)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Ignorer les caches disque (géocodage et Overpass)')
+    parser.add_argument('--test-mutation-id', type=str,
+                       help='Tester la récupération d\'informations pour un ou plusieurs IDs de mutation (séparés par des virgules)')
+    args = parser.parse_args(argv)
+
+    # Calculate minimum year from period in months (24 months by default)
+    min_year = str(subtract_months(datetime.now(), args.period).year)
+    return args, min_year
+
+def main(args: argparse.Namespace, min_year: str):
+    """
+    Main function of the script.
+
+    Args:
+        args: Parsed command-line arguments
+        min_year: Minimum mutation year for the DVF search
+    """
     address = input("Please enter the address: ")
-    coordinates = get_coordinates(address)
+    use_cache = not args.no_cache
+    coordinates = get_coordinates(address, use_cache)
     search_radius = 350  # Fixed radius of 350 meters
 
     print(f"\n🏠 GEOSPOTLIGHT REAL ESTATE ANALYSIS")
@@ -970,27 +1266,42 @@ def main():
     print(f"🌐 Coordinates: {coordinates[0]:.6f}, {coordinates[1]:.6f}")
     print(f"📏 Search radius: {search_radius} meters")
 
-    # =============================================================================
-    # SECTION 1: NEARBY AMENITIES & SERVICES ANALYSIS
-    # =============================================================================
-    print("\n" + "="*80)
-    print("🏪 SECTION 1: NEARBY AMENITIES & SERVICES")
-    print("="*80)
+    # Amenities (Overpass) and transactions (DVF) are independent: fetch the DVF
+    # data in the background while the amenities section is built
+    bbox = generate_bbox(coordinates, search_radius)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        dvf_future = executor.submit(lambda: refine_dvf_data(iter_dvf_entries(
+            bbox, min_year,
+            max_year=args.max_year,
+            property_type_codes=args.property_types,
+            min_value=args.min_value,
+            min_built_area=args.min_built_area,
+            vefa_only=args.vefa_only
+        )))
+
+        # =============================================================================
+        # SECTION 1: NEARBY AMENITIES & SERVICES ANALYSIS
+        # =============================================================================
+        print("\n" + "="*80)
+        print("🏪 SECTION 1: NEARBY AMENITIES & SERVICES")
+        print("="*80)
+
+        # One search for every category, split client-side. Overpass being
+        # unavailable (e.g. rate limited) must not prevent the DVF analysis
+        try:
+            all_places = search_places([(key, value) for key, value, _ in ALL_AMENITIES], coordinates, search_radius, use_cache)
+        except APIError as e:
+            logger.warning(f"Amenities search failed: {e}")
+            print("\n⚠️  Amenities search unavailable (Overpass API error), skipping this section.")
+        else:
+            all_amenities_data = []
+            for (category_name, _), places_by_category in zip(AMENITY_CATEGORIES, sort_places_by_amenity_category(all_places)):
+                category_data = retrieve_places_data(places_by_category, category_name)
+                all_amenities_data.extend(category_data)
+
+            display_amenities_table(all_amenities_data)
 
-    all_amenities_data = []
-    for category_name, amenities in [
-        ("Cultural and Educational", CULTURAL_AND_EDUCATIONAL_AMENITIES),
-        ("Transport", TRANSPORT_AMENITIES),
-        ("Food and Drink", FOOD_AND_DRINK_AMENITIES),
-        ("Healthcare", HEALTHCARE_AMENITIES),
-        ("Business and Finance", BUSINESS_AND_FINANCE_AMENITIES)
-    ]:
-        places = search_places(amenities, coordinates, search_radius)
-        places_by_category = sort_places_by_category(places)
-        category_data = retrieve_places_data(places_by_category, category_name)
-        all_amenities_data.extend(category_data)
-
-    display_amenities_table(all_amenities_data)
+        refined_entries = dvf_future.result()
 
     # =============================================================================
     # SECTION 2: RAW PROPERTY TRANSACTION DATA
@@ -999,12 +1310,8 @@ def main():
     print("📊 SECTION 2: PROPERTY TRANSACTION DATA")
     print("="*80)
 
-    bbox = generate_bbox(coordinates, search_radius)
-    dvf_entries = fetch_all_pages_dvf_api(bbox, min_year)
-    refined_entries = refine_dvf_data(dvf_entries)
-
     # Display raw transaction data table
-    print_comprehensive_data_table(refined_entries, args.period)
+    print_comprehensive_data_table(refined_entries, args.period, args.max_rows)
 
     # =============================================================================
     # SECTION 3: STATISTICAL ANALYSIS & MARKET INSIGHTS
@@ -1013,26 +1320,35 @@ def main():
     print("📈 SECTION 3: STATISTICAL ANALYSIS & MARKET INSIGHTS")
     print("="*80)
 
+    # Apartments vs houses, both computed in a single pass over the columns
+    if refined_entries:
+        price_stats = compute_price_stats(dvf_to_arrays(refined_entries), (DVF_APARTMENT_LABEL, DVF_HOUSE_LABEL))
+        average_apartments, median_apartments = price_stats[DVF_APARTMENT_LABEL]
+        average_houses, median_houses = price_stats[DVF_HOUSE_LABEL]
+        print(f"\n💶 PRICE PER M² BY PROPERTY TYPE")
+        print_average_and_median_prices_table(average_apartments, average_houses, median_apartments, median_houses)
+
     # Calculate and display comprehensive statistics
     comprehensive_stats = calculate_comprehensive_statistics(refined_entries)
     print_comprehensive_statistics(comprehensive_stats)
 
 if __name__ == "__main__":
-    # Test de la fonction get_location_info_by_mutation_id si un ID est fourni en argument
+    args, min_year = _parse_args()
+    # Test de la fonction get_location_info_bulk si des IDs sont fournis en argument
     if args.test_mutation_id:
-        mutation_id = args.test_mutation_id
-        result = get_location_info_by_mutation_id(mutation_id)
-        if result:
-            print(f"\n✅ Test réussi pour l'ID mutation {mutation_id}:")
-            print(f"   Parcelles: {', '.join(result['parcel_ids']) if result['parcel_ids'] else 'N/A'}")
-            print(f"   Sections: {', '.join(result['cadastral_sections']) if result['cadastral_sections'] else 'N/A'}")
-            print(f"   Date: {result['mutation_date']} ({result['mutation_year']})")
-            print(f"   Département: {result['department_code']}")
-            print(f"   INSEE: {', '.join(result['insee_codes']) if result['insee_codes'] else 'N/A'}")
-            print(f"   Type bien: {result['property_type']}")
-            print(f"   Valeur: {result['land_value']}€")
-            print(f"   Surface bâtie: {result['built_area']}m²")
-        else:
-            print(f"❌ Aucune information trouvée pour l'ID mutation {mutation_id}")
+        mutation_ids = [mutation_id.strip() for mutation_id in args.test_mutation_id.split(',') if mutation_id.strip()]
+        for mutation_id, result in zip(mutation_ids, get_location_info_bulk(mutation_ids)):
+            if result:
+                print(f"\n✅ Test réussi pour l'ID mutation {mutation_id}:")
+                print(f"   Parcelles: {', '.join(result['parcel_ids']) if result['parcel_ids'] else 'N/A'}")
+                print(f"   Sections: {', '.join(result['cadastral_sections']) if result['cadastral_sections'] else 'N/A'}")
+                print(f"   Date: {result['mutation_date']} ({result['mutation_year']})")
+                print(f"   Département: {result['department_code']}")
+                print(f"   INSEE: {', '.join(result['insee_codes']) if result['insee_codes'] else 'N/A'}")
+                print(f"   Type bien: {result['property_type']}")
+                print(f"   Valeur: {result['land_value']}€")
+                print(f"   Surface bâtie: {result['built_area']}m²")
+            else:
+                print(f"❌ Aucune information trouvée pour l'ID mutation {mutation_id}")
     else:
-        main()
+        main(args, min_year)